@@ -0,0 +1,29 @@
+"""gunicorn settings, read automatically when gunicorn starts from the repo root
+(`web: gunicorn src.app:app` in the Procfile).
+
+Each worker is its own process with its own Prometheus counters. Pointing
+PROMETHEUS_MULTIPROC_DIR at a shared directory makes every worker write its
+samples there so /metrics can report totals for the whole server.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+# Must be set before any worker imports prometheus_client, so no import of it up here
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'website-data-metrics'))
+
+def on_starting(server):
+    # Samples left by a previous server would be added to this one's
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def post_worker_init(worker):
+    # Join the scheduler election at boot, a worker may not see a request for days
+    sys.modules[worker.wsgi.import_name].start_scheduler()
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges (pages in use, waiters) from the totals
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
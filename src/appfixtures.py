@@ -0,0 +1,25 @@
+"""Shared setup for the test modules. Import it before anything imports `app`.
+
+The app binds to DATABASE_URL the first time it is imported, so this has to
+run first or the suite would end up wiping the real games.db.
+Tests that exercise the scheduler turn it back on through app.config.
+"""
+import os
+os.environ['DATABASE_URL'] = 'sqlite://'
+# Requests would otherwise start the real scheduler and take instance/scheduler.lock
+os.environ['SCHEDULER_ENABLED'] = '0'
+
+from app import app, db, init_db
+
+IN_MEMORY_URLS = {'sqlite://', 'sqlite:///:memory:'}
+
+def game(n, score='90'):
+    return {'title': f'Game {n}', 'score': score, 'link': f'https://www.metacritic.com/game/{n}/'}
+
+def reset_db():
+    """Drop every table and recreate the schema. Only ever touches an in-memory database."""
+    with app.app_context():
+        if str(db.engine.url) not in IN_MEMORY_URLS:
+            raise RuntimeError(f'Refusing to reset {db.engine.url}, tests must run on an in-memory database')
+        db.drop_all()
+        init_db(force=True)
@@ -0,0 +1,89 @@
+"""Measure time-to-first-byte and peak Python memory of /games_db exports.
+
+Seeds a throwaway SQLite catalog, then reads the streamed JSON and NDJSON
+exports and a walk over keyset pages through the Flask test client, with
+tracemalloc tracking the peak allocated while each one runs.
+
+Usage: python bench_export.py [--rows 1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+DB_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'bench.db')
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+
+from sqlalchemy import insert
+
+from app import app, db, Game, Refresh, init_db, utcnow
+
+def seed(rows):
+    with app.app_context():
+        init_db()
+        batch = 50000
+        for start in range(0, rows, batch):
+            db.session.execute(insert(Game), [
+                {'title': f'Game {n}', 'score': str(50 + n % 50), 'score_value': 50 + n % 50,
+                 'link': f'https://www.metacritic.com/game/{n}/'}
+                for n in range(start, min(start + batch, rows))
+            ])
+        now = utcnow()
+        db.session.add(Refresh(mode='replace', started_at=now, finished_at=now, total=rows,
+                               added=rows, changed=0, removed=0, write_ms=0.0))
+        db.session.commit()
+
+def measure(label, read):
+    tracemalloc.start()
+    start = time.perf_counter()
+    ttfb, size = read()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:>14} {ttfb * 1000:>9.1f} {elapsed:>9.2f} {size / 2**20:>9.1f} {peak / 2**20:>12.1f}')
+
+def read_stream(client, url):
+    def read():
+        start = time.perf_counter()
+        response = client.get(url, buffered=False)
+        chunks = iter(response.response)
+        size = len(next(chunks))
+        ttfb = time.perf_counter() - start
+        for chunk in chunks:
+            size += len(chunk)
+        response.close()
+        return ttfb, size
+    return read
+
+def read_pages(client, limit):
+    def read():
+        start = time.perf_counter()
+        ttfb = None
+        size = 0
+        url = f'/games_db?limit={limit}'
+        while url:
+            response = client.get(url)
+            ttfb = ttfb or time.perf_counter() - start
+            size += len(response.get_data())
+            cursor = response.headers.get('X-Next-Cursor')
+            url = f'/games_db?after={cursor}&limit={limit}' if cursor else None
+        return ttfb, size
+    return read
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    seed(args.rows)
+    client = app.test_client()
+    print(f'{args.rows} rows')
+    print(f"{'export':>14} {'ttfb ms':>9} {'seconds':>9} {'MiB out':>9} {'peak MiB':>12}")
+    measure('json stream', read_stream(client, '/games_db'))
+    measure('ndjson stream', read_stream(client, '/games_db?format=ndjson'))
+    measure('pages of 1000', read_pages(client, 1000))
+
+if __name__ == '__main__':
+    main()
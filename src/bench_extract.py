@@ -0,0 +1,35 @@
+"""Time each offline card extractor over the saved browse-page fixtures.
+
+Usage: python bench_extract.py [--rounds 20]
+"""
+import argparse
+import glob
+import os
+import time
+
+from app import HTML_EXTRACTORS
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    pages = [open(path, encoding='utf-8').read() for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))]
+    print(f"{len(pages)} pages, {sum(map(len, pages)) // 1024} KiB, {args.rounds} rounds")
+    print(f"{'extractor':>9} {'ms/page':>8} {'cards/s':>9} {'speedup':>8}")
+
+    baseline = None
+    for name, extract in HTML_EXTRACTORS.items():
+        cards = 0
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for html in pages:
+                cards += len(extract(html))
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f'{name:>9} {elapsed * 1000 / (args.rounds * len(pages)):>8.2f} {cards / elapsed:>9.0f} {baseline / elapsed:>7.1f}x')
+
+if __name__ == '__main__':
+    main()
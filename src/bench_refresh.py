@@ -0,0 +1,62 @@
+"""Time catalog refreshes against a throwaway SQLite file.
+
+Seeds the catalog, then refreshes it with a small fraction of games added,
+changed and removed, in both refresh modes, while a reader thread keeps
+querying the table.
+
+Usage: python bench_refresh.py [--rows 10000] [--churn 0.01]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+DB_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'bench.db')
+
+from app import app, db, Game, refresh_games
+
+def catalog(rows, churn, generation):
+    step = max(1, int(1 / churn)) if churn else rows + 1
+    games = []
+    for n in range(generation * rows // step, rows + generation * rows // step):
+        score = str(50 + (n + generation) % 50) if n % step == 0 else str(50 + n % 50)
+        games.append({'title': f'Game {n}', 'score': score, 'link': f'https://www.metacritic.com/game/{n}/'})
+    return games
+
+def reader(stop, latencies):
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            Game.query.limit(10).all()
+            latencies.append(time.perf_counter() - start)
+            db.session.remove()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--churn', type=float, default=0.01)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.drop_all()
+        refresh_games(catalog(args.rows, args.churn, 0))
+
+        print(f"{'mode':>11} {'added':>6} {'changed':>7} {'removed':>7} {'write ms':>9} {'total ms':>9} {'max read ms':>11}")
+        for generation, mode in enumerate(['incremental', 'replace'], start=1):
+            games = catalog(args.rows, args.churn, generation)
+            stop = threading.Event()
+            latencies = []
+            thread = threading.Thread(target=reader, args=(stop, latencies))
+            thread.start()
+            start = time.perf_counter()
+            refresh = refresh_games(games, mode=mode)
+            total = time.perf_counter() - start
+            stop.set()
+            thread.join()
+            print(f'{mode:>11} {refresh.added:>6} {refresh.changed:>7} {refresh.removed:>7} '
+                  f'{refresh.write_ms:>9.1f} {total * 1000:>9.1f} {max(latencies) * 1000:>11.1f}')
+
+if __name__ == '__main__':
+    main()
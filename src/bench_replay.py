@@ -0,0 +1,185 @@
+"""Replay the recorded browse pages offline and load-test the API.
+
+Serves fixtures/ from a local FixtureServer and points METACRITIC_BASE_URL at
+it, so nothing reaches metacritic.com and runs are comparable between
+versions. Measures:
+
+  * scrape throughput in pages/sec and games/sec for each --concurrency
+  * p50/p95/p99 latency of /games, /games_db, /average_score and /api/games
+    with --clients concurrent clients against a threaded server running the
+    app; the scrape cache is cleared first so /api/games includes a cold miss
+  * the process's peak RSS after each phase
+
+Only the HTTP tier is used unless SCRAPE_TIERS says otherwise, since the
+recorded pages are server-rendered. --json writes every number to a file.
+
+Usage: python bench_replay.py [--concurrency 1 4] [--clients 8] [--requests 200] [--json results.json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DB_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'bench.db')
+os.environ.setdefault('SCHEDULER_ENABLED', '0')
+os.environ.setdefault('SCRAPE_TIERS', 'http')
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import app, games_cache, init_db, refresh_games, scrape_metacritic
+from fixtureserver import FixtureServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = ['/games?count=24', '/games_db', '/average_score', '/api/games?count=24']
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def peak_rss_mib():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (2**20 if sys.platform == 'darwin' else 2**10)
+
+def percentile(sorted_values, q):
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_scrape(server, concurrency, rounds):
+    pages = games = 0
+    elapsed = 0.0
+    for _ in range(rounds):
+        server.hits.clear()
+        start = time.perf_counter()
+        scraped = scrape_metacritic(concurrency=concurrency)
+        elapsed += time.perf_counter() - start
+        # Only pages that had cards count, not the 404 probes past the end
+        pages += sum(1 for page_num in server.hits if page_num <= server.pages)
+        games += len(scraped)
+    return {
+        'concurrency': concurrency,
+        'rounds': rounds,
+        'pages': pages,
+        'games': games,
+        'seconds': elapsed,
+        'pages_per_sec': pages / elapsed,
+        'games_per_sec': games / elapsed,
+    }, scraped
+
+def bench_endpoint(base_url, path, clients, total):
+    def client(requests_to_send):
+        latencies = []
+        errors = 0
+        with requests.Session() as session:
+            for _ in range(requests_to_send):
+                start = time.perf_counter()
+                response = session.get(base_url + path)
+                response.content
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+        return latencies, errors
+
+    shares = [total // clients + (1 if i < total % clients else 0) for i in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        results = list(executor.map(client, shares))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    return {
+        'path': path,
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in results),
+        'requests_per_sec': len(latencies) / wall,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--rounds', type=int, default=5, help='scrapes of the whole replay per concurrency')
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds each replayed page takes to serve')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint, split across clients')
+    parser.add_argument('--json', metavar='PATH', help='also write the results here')
+    args = parser.parse_args()
+
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'options': vars(args),
+        'scrape': [],
+        'endpoints': [],
+        'peak_rss_mib': {},
+    }
+
+    with FixtureServer(delay=args.delay, recorded=True) as fixtures:
+        app.config['METACRITIC_BASE_URL'] = fixtures.base_url
+        print(f'replaying {fixtures.pages} recorded pages from {fixtures.base_url}')
+        print(f"{'concurrency':>11} {'pages/s':>9} {'games/s':>9}")
+        for concurrency in args.concurrency:
+            row, games = bench_scrape(fixtures, concurrency, args.rounds)
+            results['scrape'].append(row)
+            print(f"{concurrency:>11} {row['pages_per_sec']:>9.1f} {row['games_per_sec']:>9.1f}")
+        results['peak_rss_mib']['scrape'] = peak_rss_mib()
+
+        with app.app_context():
+            init_db()
+            refresh_games(games)
+        games_cache.clear()
+
+        server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base_url = f'http://127.0.0.1:{server.server_port}'
+            print(f"\n{args.clients} clients, {args.requests} requests per endpoint")
+            print(f"{'endpoint':>22} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            for path in ENDPOINTS:
+                row = bench_endpoint(base_url, path, args.clients, args.requests)
+                results['endpoints'].append(row)
+                print(f"{path:>22} {row['requests_per_sec']:>8.1f} {row['p50_ms']:>8.1f} "
+                      f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['errors']:>7}")
+        finally:
+            server.shutdown()
+            thread.join()
+        results['peak_rss_mib']['load'] = peak_rss_mib()
+
+    peaks = [f'{phase} {mib:.1f}' for phase, mib in results['peak_rss_mib'].items() if mib is not None]
+    if peaks:
+        print('\npeak RSS MiB: ' + ', '.join(peaks))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'results written to {args.json}')
+
+if __name__ == '__main__':
+    main()
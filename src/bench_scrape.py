@@ -0,0 +1,30 @@
+"""Compare sequential and concurrent scraping against locally served browse pages.
+
+Usage: python bench_scrape.py [--pages 12] [--delay 0.5] [--concurrency 1 2 4 8]
+"""
+import argparse
+import time
+
+from app import scrape_metacritic
+from fixtureserver import FixtureServer
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=12)
+    parser.add_argument('--per-page', type=int, default=24)
+    parser.add_argument('--delay', type=float, default=0.5, help='seconds each page takes to serve')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with FixtureServer(pages=args.pages, per_page=args.per_page, delay=args.delay) as server:
+        baseline = None
+        print(f"{'concurrency':>11} {'games':>6} {'seconds':>8} {'speedup':>8}")
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            games = scrape_metacritic(concurrency=concurrency, browse_url=server.browse_url)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f'{concurrency:>11} {len(games):>6} {elapsed:>8.2f} {baseline / elapsed:>7.1f}x')
+
+if __name__ == '__main__':
+    main()
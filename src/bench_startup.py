@@ -0,0 +1,49 @@
+"""Measure how long a fresh worker takes to import the app and serve its first requests.
+
+Each run is a new Python process, like a gunicorn worker booting.
+
+Usage: python bench_startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = '''
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/health')
+first = time.perf_counter()
+client.get('/health')
+second = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_request_ms': (first - imported) * 1000,
+    'second_request_ms': (second - first) * 1000,
+}))
+'''
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ, DATABASE_URL='sqlite://', SCHEDULER_ENABLED='0')
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, '-c', PROBE], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             env=env, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'metric':>18} {'median ms':>10} {'max ms':>8}")
+    for metric in ('import_ms', 'first_request_ms', 'second_request_ms'):
+        values = [run[metric] for run in runs]
+        print(f'{metric:>18} {statistics.median(values):>10.1f} {max(values):>8.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Local stand-in for the metacritic browse pages, used by tests and benchmarks."""
+import gzip
+import json
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+CARD_TEMPLATE = '''
+<div class="c-finderProductCard">
+  <a class="c-finderProductCard_container" href="/game/{slug}/">
+    <div class="c-finderProductCard_titleHeading"><span>{rank}.</span><span>{title}</span></div>
+    <div class="c-finderProductCard_score">
+      <div class="c-siteReviewScore"><span>{score}</span></div>
+    </div>
+  </a>
+</div>'''
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head><title>Best Video Games of All Time - Page {page}</title></head>
+<body>
+<div class="c-productListings">{cards}
+</div>
+</body>
+</html>'''
+
+# Same page, but the cards only exist once a browser has run the script
+JS_PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head><title>Best Video Games of All Time - Page {page}</title></head>
+<body>
+<div class="c-productListings" id="listings"></div>
+<script>document.getElementById('listings').innerHTML = {cards};</script>
+</body>
+</html>'''
+
+# Browse pages saved from the real site: browse-page-1.html, browse-page-2.html, ...
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def load_recorded_pages(fixture_dir=FIXTURE_DIR):
+    """Read the saved browse pages in page order, stopping at the first gap."""
+    pages = []
+    while True:
+        path = os.path.join(fixture_dir, f'browse-page-{len(pages) + 1}.html')
+        if not os.path.exists(path):
+            return pages
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+
+def render_browse_page(page_num, per_page=24, js_only=False):
+    cards = []
+    for i in range(per_page):
+        rank = (page_num - 1) * per_page + i + 1
+        cards.append(CARD_TEMPLATE.format(
+            slug=f'fixture-game-{rank}',
+            rank=rank,
+            title=f'Fixture Game {rank}',
+            score=100 - rank % 60
+        ))
+    if js_only:
+        return JS_PAGE_TEMPLATE.format(page=page_num, cards=json.dumps(''.join(cards)))
+    return PAGE_TEMPLATE.format(page=page_num, cards=''.join(cards))
+
+class FixtureServer:
+    """Serve `pages` browse pages of `per_page` cards each on a random local port.
+
+    Every response is held back by `delay` seconds to stand in for network and
+    render latency; pages past the end of the catalog return 404. Pages in
+    `js_pages` only carry their cards in a script, as a client-rendered page
+    would. Responses are gzipped when the client accepts it and connections
+    are kept alive; `hits`, `encodings` and `client_ports` record what came in.
+
+    With `recorded=True` the saved pages in fixtures/ are replayed instead of
+    generated ones, and `pages` and `per_page` are ignored.
+    """
+
+    def __init__(self, pages=5, per_page=24, delay=0.0, js_pages=(), recorded=False):
+        self.recorded = load_recorded_pages() if recorded else None
+        self.pages = len(self.recorded) if recorded else pages
+        self.per_page = per_page
+        self.delay = delay
+        self.js_pages = set(js_pages)
+        self.hits = []
+        self.encodings = []
+        self.client_ports = set()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    @property
+    def browse_url(self):
+        return self.base_url + '/browse/game/?page={page}'
+
+    def render(self, page_num, server_side=False):
+        if self.recorded is not None:
+            return self.recorded[page_num - 1] if 1 <= page_num <= self.pages else None
+        if 1 <= page_num <= self.pages:
+            js_only = page_num in self.js_pages and not server_side
+            return render_browse_page(page_num, self.per_page, js_only=js_only)
+        return None
+
+    def _handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                page_num = int(query.get('page', ['1'])[0])
+                fixture.hits.append(page_num)
+                fixture.client_ports.add(self.client_address[1])
+                accept_encoding = self.headers.get('Accept-Encoding', '')
+                fixture.encodings.append(accept_encoding)
+                time.sleep(fixture.delay)
+                body = fixture.render(page_num)
+                if body is None:
+                    self.send_response(404)
+                    body = '<html><body>No results</body></html>'
+                else:
+                    self.send_response(200)
+                payload = body.encode('utf-8')
+                if 'gzip' in accept_encoding:
+                    payload = gzip.compress(payload)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
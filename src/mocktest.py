@@ -1,3 +1,5 @@
+import appfixtures
+
 import unittest
 from unittest.mock import patch
 from app import app
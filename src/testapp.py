@@ -1,3 +1,5 @@
+import appfixtures
+
 import unittest
 from app import scrape_metacritic  
 
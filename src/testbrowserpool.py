@@ -0,0 +1,180 @@
+import appfixtures
+
+import asyncio
+import threading
+import unittest
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from app import BrowserPool, BrowserPoolTimeout, fetch_with_browser, scrape_metacritic
+
+class FakeLocator:
+    def __init__(self, matches):
+        self.matches = matches
+
+    async def count(self):
+        return self.matches
+
+class FakePage:
+    """A loaded page that never renders a card."""
+
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def goto(self, url, timeout=None):
+        return None
+
+    async def wait_for_selector(self, selector):
+        raise PlaywrightTimeoutError(f'Timeout waiting for {selector}')
+
+    def locator(self, selector):
+        return FakeLocator(1 if self.browser.no_results else 0)
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def new_page(self):
+        return FakePage(self.browser)
+
+    async def close(self):
+        self.closed = True
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.no_results = False
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    async def new_context(self):
+        return FakeContext(self)
+
+    async def close(self):
+        self.closed = True
+
+class FakeLauncher:
+    def __init__(self):
+        self.browsers = []
+
+    async def __call__(self):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+class TestBrowserPool(unittest.TestCase):
+    def make_pool(self, **kwargs):
+        self.launcher = FakeLauncher()
+        pool = BrowserPool(launcher=self.launcher, **kwargs)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def checkout(self, pool):
+        async def use():
+            async with pool.page() as page:
+                return page.browser
+        return pool.run(use())
+
+    def test_browser_stays_warm_between_checkouts(self):
+        pool = self.make_pool()
+        first = self.checkout(pool)
+        second = self.checkout(pool)
+        self.assertIs(first, second)
+        self.assertEqual(len(self.launcher.browsers), 1)
+
+    def test_browser_recycled_after_max_uses(self):
+        pool = self.make_pool(max_uses=2)
+        browsers = [self.checkout(pool) for _ in range(3)]
+        self.assertIs(browsers[0], browsers[1])
+        self.assertIsNot(browsers[1], browsers[2])
+        self.assertTrue(browsers[0].closed)
+
+    def test_crashed_browser_is_replaced(self):
+        pool = self.make_pool()
+        first = self.checkout(pool)
+        first.connected = False
+        second = self.checkout(pool)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(self.launcher.browsers), 2)
+
+    def test_checkout_times_out_when_pool_is_full(self):
+        pool = self.make_pool(max_pages=1, checkout_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold_then_wait():
+            async def holder():
+                async with pool.page():
+                    await release.wait()
+            task = asyncio.ensure_future(holder())
+            await asyncio.sleep(0)
+            try:
+                async with pool.page():
+                    pass
+            finally:
+                release.set()
+                await task
+
+        with self.assertRaises(BrowserPoolTimeout):
+            pool.run(hold_then_wait())
+
+    def test_checkouts_are_bounded(self):
+        pool = self.make_pool(size=2, max_pages=3)
+        in_use = []
+        peak = []
+
+        async def use():
+            async with pool.page():
+                in_use.append(1)
+                peak.append(len(in_use))
+                await asyncio.sleep(0.01)
+                in_use.pop()
+
+        async def many():
+            await asyncio.gather(*(use() for _ in range(10)))
+
+        pool.run(many())
+        self.assertEqual(max(peak), 3)
+        self.assertEqual(len(self.launcher.browsers), 2)
+
+    def test_callers_from_several_threads_share_the_pool(self):
+        pool = self.make_pool()
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(self.checkout(pool))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(len(self.launcher.browsers), 1)
+
+    def test_shutdown_closes_browsers(self):
+        pool = self.make_pool()
+        browser = self.checkout(pool)
+        pool.shutdown()
+        self.assertTrue(browser.closed)
+
+    def test_scrape_surfaces_pool_timeout(self):
+        pool = self.make_pool(max_pages=1, checkout_timeout=0.01)
+        # Take the only page slot so the scrape has to queue for it
+        pool._start()
+        pool.run(pool._semaphore.acquire())
+        with self.assertRaises(BrowserPoolTimeout):
+            scrape_metacritic(count=1, concurrency=1, pool=pool)
+
+    def test_page_without_cards_is_an_error(self):
+        pool = self.make_pool()
+        with self.assertRaises(PlaywrightTimeoutError):
+            pool.run(fetch_with_browser(pool, 'https://example.test/browse'))
+
+    def test_no_results_page_ends_the_catalog(self):
+        pool = self.make_pool()
+        self.checkout(pool).no_results = True
+        self.assertEqual(pool.run(fetch_with_browser(pool, 'https://example.test/browse')), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+from appfixtures import reset_db
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app import app, db, Game, ScrapeCache, games_cache
+
+CATALOG = [{'title': f'Game {i}', 'score': str(90 - i), 'link': f'https://www.metacritic.com/game/{i}/'} for i in range(50)]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class CountingFetch:
+    def __init__(self, delay=0.0, catalog=CATALOG):
+        self.calls = []
+        self.delay = delay
+        self.catalog = catalog
+
+    def __call__(self, count):
+        self.calls.append(count)
+        time.sleep(self.delay)
+        return self.catalog if count is None else self.catalog[:count]
+
+class TestScrapeCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.fetch = CountingFetch()
+        self.cache = ScrapeCache(self.fetch, ttl=10, stale_ttl=100, max_entries=2, clock=self.clock)
+
+    def test_miss_then_hit(self):
+        self.assertEqual(self.cache.get(5), (CATALOG[:5], 'live'))
+        self.assertEqual(self.cache.get(5), (CATALOG[:5], 'cache'))
+        self.assertEqual(self.fetch.calls, [5])
+
+    def test_larger_result_serves_smaller_count(self):
+        self.cache.get(20)
+        self.assertEqual(self.cache.get(3), (CATALOG[:3], 'cache'))
+        self.assertEqual(self.fetch.calls, [20])
+
+    def test_short_result_serves_any_count(self):
+        # The catalog only had 50 games, so asking for more changes nothing
+        self.cache.get(80)
+        self.assertEqual(self.cache.get(None), (CATALOG, 'cache'))
+        self.assertEqual(self.fetch.calls, [80])
+
+    def test_smaller_result_does_not_serve_larger_count(self):
+        self.cache.get(3)
+        self.assertEqual(self.cache.get(10), (CATALOG[:10], 'live'))
+
+    def test_stale_entry_served_while_refreshing(self):
+        self.cache.get(5)
+        self.clock.now = 20
+        self.assertEqual(self.cache.get(5), (CATALOG[:5], 'stale'))
+        for _ in range(100):
+            if len(self.fetch.calls) == 2 and not self.cache._in_flight:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.fetch.calls, [5, 5])
+        self.assertEqual(self.cache.get(5)[1], 'cache')
+
+    def test_expired_past_stale_window_is_refetched(self):
+        self.cache.get(5)
+        self.clock.now = 200
+        self.assertEqual(self.cache.get(5)[1], 'live')
+
+    def test_least_recently_used_entry_evicted(self):
+        self.cache.get(1)
+        self.cache.get(2)
+        self.cache.get(1)
+        self.cache.get(None)
+        self.assertEqual(list(self.cache._entries), [1, None])
+
+    def test_concurrent_misses_share_one_scrape(self):
+        self.fetch.delay = 0.05
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get(10))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.fetch.calls, [10])
+        self.assertEqual(results, [(CATALOG[:10], 'live')] * 8)
+
+    def test_failure_is_not_cached(self):
+        def failing(count):
+            raise RuntimeError('boom')
+        cache = ScrapeCache(failing, clock=self.clock)
+        with self.assertRaises(RuntimeError):
+            cache.get(5)
+        self.assertEqual(len(cache._entries), 0)
+        self.assertEqual(len(cache._in_flight), 0)
+
+class TestApiGamesCache(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        games_cache.clear()
+        reset_db()
+
+    def tearDown(self):
+        games_cache.clear()
+
+    @patch('app.scrape_metacritic')
+    def test_source_header(self, mock_scrape):
+        mock_scrape.side_effect = lambda count: CATALOG[:count]
+        response = self.client.get('/api/games?count=4')
+        self.assertEqual(response.headers['X-Data-Source'], 'live')
+        response = self.client.get('/api/games?count=2')
+        self.assertEqual(response.headers['X-Data-Source'], 'cache')
+        self.assertEqual(response.get_json(), CATALOG[:2])
+        self.assertEqual(mock_scrape.call_count, 1)
+
+    @patch('app.scrape_metacritic')
+    def test_falls_back_to_database(self, mock_scrape):
+        mock_scrape.side_effect = RuntimeError('metacritic unreachable')
+        with app.app_context():
+            db.session.add(Game(title='Stored Game', score='88', link='https://www.metacritic.com/game/stored/'))
+            db.session.commit()
+        response = self.client.get('/api/games?count=5')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Data-Source'], 'database')
+        self.assertEqual(response.get_json()[0]['title'], 'Stored Game')
+
+    @patch('app.scrape_metacritic')
+    def test_error_when_nothing_to_fall_back_on(self, mock_scrape):
+        mock_scrape.side_effect = RuntimeError('metacritic unreachable')
+        response = self.client.get('/api/games?count=5')
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('error', response.get_json())
+
+    @patch('app.scrape_metacritic')
+    def test_count_is_validated_before_scraping(self, mock_scrape):
+        mock_scrape.side_effect = lambda count: CATALOG[:count]
+        for count in (0, -5):
+            self.assertEqual(self.client.get(f'/api/games?count={count}').status_code, 400)
+        mock_scrape.assert_not_called()
+        with patch.dict(app.config, {'GAMES_PAGE_MAX': 20}):
+            response = self.client.get('/api/games?count=1000000')
+        self.assertEqual(len(response.get_json()), 20)
+        mock_scrape.assert_called_once_with(20)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import appfixtures
+
+import asyncio
+import glob
+import os
+import unittest
+
+from app import HTML_EXTRACTORS, extract_in_page, extract_lxml, extract_soup, parse_cards
+from fixtureserver import render_browse_page
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+EDGE_CASES = {
+    'missing fields': '<div class="c-finderProductCard"></div>',
+    'empty href': '<div class="c-finderProductCard"><a class="c-finderProductCard_container" href="">x</a></div>',
+    'no href': '<div class="c-finderProductCard"><a class="c-finderProductCard_container">x</a></div>',
+    'nested title text': '''
+        <div class="c-finderProductCard"><h3 class="c-finderProductCard_titleHeading">
+          <span>7.</span><span> Half-Life <b>2</b> <!-- note --> </span></h3></div>''',
+    'entities': '''
+        <div class="c-finderProductCard"><h3 class="c-finderProductCard_titleHeading">
+          <span>1.</span><span>Ratchet &amp; Clank&#8482;</span></h3></div>''',
+    'extra classes': '''
+        <div class="x c-finderProductCard c-finderProductCard-game">
+          <div class="c-finderProductCard_score"><div class="big c-siteReviewScore green"><span>91</span></div></div>
+        </div>''',
+    'similar class names': '''
+        <div class="c-finderProductCard">
+          <div class="c-finderProductCard_scoreLabel"><div class="c-siteReviewScore"><span>12</span></div></div>
+          <div class="c-finderProductCard_score"><div class="c-siteReviewScoreX"><span>34</span></div></div>
+        </div>''',
+    'no cards': '<html><body><p>No results</p></body></html>',
+    'empty document': '',
+}
+
+def fixture_pages():
+    pages = {os.path.basename(path): open(path, encoding='utf-8').read()
+             for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))}
+    pages['generated'] = render_browse_page(3)
+    pages.update(EDGE_CASES)
+    return pages
+
+class TestExtractorParity(unittest.TestCase):
+    def test_lxml_matches_soup(self):
+        for name, html in fixture_pages().items():
+            with self.subTest(page=name):
+                self.assertEqual(extract_lxml(html), extract_soup(html))
+
+    def test_recorded_fixtures_have_cards(self):
+        games = extract_lxml(open(os.path.join(FIXTURE_DIR, 'browse-page-1.html'), encoding='utf-8').read())
+        self.assertEqual(len(games), 24)
+        self.assertEqual(games[0], {
+            'title': 'The Legend of Zelda: Ocarina of Time',
+            'score': '99',
+            'link': 'https://www.metacritic.com/game/the-legend-of-zelda-ocarina-of-time/'
+        })
+
+    def test_html_extractors_registered(self):
+        self.assertEqual(set(HTML_EXTRACTORS), {'soup', 'lxml'})
+
+    def test_parse_cards_checks_the_extractor_name(self):
+        html = render_browse_page(1, per_page=2)
+        self.assertEqual(parse_cards(html, extractor='browser'), extract_lxml(html))
+        with self.assertRaisesRegex(ValueError, "'lmxl'"):
+            parse_cards(html, extractor='lmxl')
+
+    def test_in_page_extractor_matches_soup(self):
+        from playwright.async_api import async_playwright
+
+        async def extract_all(pages):
+            async with async_playwright() as p:
+                try:
+                    browser = await p.chromium.launch(headless=True)
+                except Exception as e:
+                    self.skipTest(f'Chromium is not available: {e}')
+                page = await browser.new_page()
+                results = {}
+                for name, html in pages.items():
+                    await page.set_content(html)
+                    results[name] = await extract_in_page(page)
+                await browser.close()
+                return results
+
+        pages = fixture_pages()
+        results = asyncio.run(extract_all(pages))
+        for name, html in pages.items():
+            with self.subTest(page=name):
+                self.assertEqual(results[name], extract_soup(html))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,350 @@
+from appfixtures import game, reset_db
+
+import asyncio
+import collections
+import contextlib
+import os
+import queue
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+from datetime import timedelta
+import unittest
+from unittest.mock import patch
+
+import app as app_module
+from app import (app, db, Game, ScrapeJob, AmqpJobBackend, InProcessJobBackend,
+                 games_cache, job_store_all_games, reap_stale_jobs, run_scrape_job, utcnow)
+
+def fake_scrape(pages=3, per_page=2, gate=None, started=None):
+    """Stand-in for scrape_metacritic that reports progress page by page."""
+    def scrape(count=None, progress=None):
+        if started is not None:
+            started.set()
+        games = []
+        for page_num in range(1, pages + 1):
+            if gate is not None:
+                gate.wait(5)
+            games.extend(game((page_num - 1) * per_page + i) for i in range(per_page))
+            if progress is not None:
+                asyncio.run(progress(page_num, len(games)))
+        return games
+    return scrape
+
+class RecordingBackend:
+    """In-process backend that only runs a job once the test asks for it.
+
+    The in-memory test database is a single connection, so a job must not
+    start while the request that submitted it is still using it.
+    """
+
+    def __init__(self):
+        self.submitted = []
+        self.futures = {}
+        self._inner = InProcessJobBackend(workers=1)
+
+    def submit(self, job_id):
+        self.submitted.append(job_id)
+
+    def start(self, job_id):
+        self.futures[job_id] = self._inner.submit(job_id)
+
+    def wait(self, job_id):
+        if job_id not in self.futures:
+            self.start(job_id)
+        self.futures[job_id].result(timeout=5)
+
+    def shutdown(self):
+        self._inner.shutdown()
+
+class JobTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        reset_db()
+        self.backend = RecordingBackend()
+        patcher = patch.object(app_module, 'job_backend', self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.backend.shutdown)
+        self.addCleanup(games_cache.clear)
+
+    def job(self, job_id):
+        return self.client.get(f'/scrape/{job_id}').get_json()
+
+class TestScrapeJobApi(JobTestCase):
+    @patch('app.scrape_metacritic', new_callable=lambda: fake_scrape(pages=3))
+    def test_job_runs_to_completion(self, _):
+        response = self.client.post('/scrape', json={'count': 6})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job']['id']
+        self.assertEqual(response.headers['Location'], f'/scrape/{job_id}')
+
+        self.backend.wait(job_id)
+        job = self.job(job_id)
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual((job['pages_done'], job['games_collected']), (3, 6))
+        self.assertIsNotNone(job['refresh_id'])
+        self.assertGreaterEqual(job['elapsed_seconds'], 0)
+        with app.app_context():
+            self.assertEqual(Game.query.count(), 6)
+
+    def test_all_route_queues_a_job(self):
+        response = self.client.get('/all')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()['job']['count'], 100)
+
+    @patch('app.scrape_metacritic')
+    def test_failed_scrape_is_reported(self, mock_scrape):
+        mock_scrape.side_effect = RuntimeError('metacritic unreachable')
+        job_id = self.client.post('/scrape').get_json()['job']['id']
+        self.backend.wait(job_id)
+        job = self.job(job_id)
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['error'], 'metacritic unreachable')
+
+    def test_running_job_can_be_cancelled(self):
+        gate = threading.Event()
+        started = threading.Event()
+        with patch('app.scrape_metacritic', fake_scrape(pages=5, gate=gate, started=started)):
+            job_id = self.client.post('/scrape').get_json()['job']['id']
+            self.backend.start(job_id)
+            self.assertTrue(started.wait(5))
+            response = self.client.post(f'/scrape/{job_id}/cancel')
+            self.assertEqual(response.status_code, 202)
+            gate.set()
+            self.backend.wait(job_id)
+        job = self.job(job_id)
+        self.assertEqual(job['status'], 'cancelled')
+        self.assertEqual(job['pages_done'], 1)
+        with app.app_context():
+            self.assertEqual(Game.query.count(), 0)
+
+    def test_bad_count_rejected(self):
+        self.assertEqual(self.client.post('/scrape', json={'count': 0}).status_code, 400)
+        self.assertEqual(self.client.post('/scrape', json={'count': 'all'}).status_code, 400)
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/scrape/nope').status_code, 404)
+        self.assertEqual(self.client.post('/scrape/nope/cancel').status_code, 404)
+
+class TestQueuedJobs(JobTestCase):
+    def test_queued_job_cancelled_is_never_run(self):
+        job_id = self.client.post('/scrape').get_json()['job']['id']
+        self.assertEqual(self.client.post(f'/scrape/{job_id}/cancel').get_json()['status'], 'cancelled')
+        with patch('app.scrape_metacritic') as mock_scrape:
+            run_scrape_job(job_id)
+        mock_scrape.assert_not_called()
+        self.assertEqual(self.client.post(f'/scrape/{job_id}/cancel').status_code, 409)
+
+    def test_queue_is_bounded(self):
+        with patch.dict(app.config, {'SCRAPE_JOB_QUEUE_SIZE': 2}):
+            codes = [self.client.post('/scrape').status_code for _ in range(3)]
+        self.assertEqual(codes, [202, 202, 503])
+
+    def test_weekly_job_goes_through_the_queue(self):
+        job_store_all_games()
+        self.assertEqual(len(self.backend.submitted), 1)
+        with app.app_context():
+            job = db.session.get(ScrapeJob, self.backend.submitted[0])
+            self.assertEqual((job.trigger, job.count, job.status), ('schedule', 100, 'queued'))
+
+class BrokenBackend:
+    def submit(self, job_id):
+        raise ConnectionError('broker unreachable')
+
+    def shutdown(self):
+        pass
+
+EXIT_WITH_QUEUED_JOBS = textwrap.dedent('''
+    import os, sys, time
+    os.environ['DATABASE_URL'] = 'sqlite:///' + sys.argv[1]
+    os.environ['SCHEDULER_ENABLED'] = '0'
+    import app as app_module
+
+    def slow_job(job_id, resume=False):
+        time.sleep(0.5)
+        print('ran', flush=True)
+
+    app_module.run_scrape_job = slow_job
+    with app_module.app.app_context():
+        for _ in range(3):
+            app_module.submit_scrape_job()
+            time.sleep(0.01)
+''')
+
+class TestLostJobs(JobTestCase):
+    def statuses(self):
+        with app.app_context():
+            return {job.id: job.status for job in ScrapeJob.query.all()}
+
+    def test_failed_submit_does_not_fill_the_queue(self):
+        with patch.object(app_module, 'job_backend', BrokenBackend()), \
+                patch.dict(app.config, {'SCRAPE_JOB_QUEUE_SIZE': 2}):
+            codes = [self.client.post('/scrape').status_code for _ in range(3)]
+            self.assertEqual(codes, [503, 503, 503])
+        self.assertEqual(set(self.statuses().values()), {'failed'})
+        with patch.dict(app.config, {'SCRAPE_JOB_QUEUE_SIZE': 2}):
+            self.assertEqual(self.client.post('/scrape').status_code, 202)
+
+    def test_weekly_job_survives_a_failed_submit(self):
+        with patch.object(app_module, 'job_backend', BrokenBackend()):
+            job_store_all_games()
+        self.assertEqual(list(self.statuses().values()), ['failed'])
+
+    def test_shutdown_fails_jobs_that_never_started(self):
+        gate = threading.Event()
+        backend = InProcessJobBackend(workers=1)
+        # Keep the only worker thread busy so both jobs are still waiting for it
+        backend._executor.submit(gate.wait, 5)
+        with patch.object(app_module, 'job_backend', backend):
+            job_ids = [self.client.post('/scrape').get_json()['job']['id'] for _ in range(2)]
+        backend.shutdown()
+        gate.set()
+        self.assertEqual([self.statuses()[job_id] for job_id in job_ids], ['failed', 'failed'])
+
+    def test_process_exit_fails_jobs_that_never_started(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'games.db')
+            output = subprocess.run(
+                [sys.executable, '-c', EXIT_WITH_QUEUED_JOBS, path], cwd=os.path.dirname(os.path.abspath(__file__)),
+                capture_output=True, text=True, timeout=60, check=True
+            ).stdout
+            with contextlib.closing(sqlite3.connect(path)) as conn:
+                statuses = [status for status, in conn.execute('SELECT status FROM scrape_job ORDER BY created_at')]
+        # Only the job that had a thread ran, exit did not wait for the other two
+        self.assertEqual(output.split(), ['ran'])
+        self.assertEqual(statuses[1:], ['failed', 'failed'])
+
+    def test_reaper_fails_jobs_past_the_timeout(self):
+        old = utcnow() - timedelta(seconds=app.config['SCRAPE_JOB_TIMEOUT'] + 60)
+        with app.app_context():
+            db.session.add_all([
+                ScrapeJob(id='stuck-queued', status='queued', created_at=old),
+                ScrapeJob(id='stuck-running', status='running', created_at=old, started_at=old),
+                ScrapeJob(id='fresh', status='queued', created_at=utcnow()),
+            ])
+            db.session.commit()
+            # Stale rows no longer count against the queue, even before they are reaped
+            with patch.dict(app.config, {'SCRAPE_JOB_QUEUE_SIZE': 2}):
+                self.assertEqual(self.client.post('/scrape').status_code, 202)
+            self.assertEqual(reap_stale_jobs(), 2)
+        statuses = self.statuses()
+        self.assertEqual((statuses['stuck-queued'], statuses['stuck-running'], statuses['fresh']),
+                         ('failed', 'failed', 'queued'))
+
+# Local stand-in for a RabbitMQ broker, enough of pika's blocking API for the backend
+Method = collections.namedtuple('Method', 'delivery_tag redelivered')
+
+class FakeBroker:
+    def __init__(self):
+        self.queues = collections.defaultdict(collections.deque)
+        self.acked = []
+
+    def connect(self):
+        return FakeConnection(self)
+
+class FakeConnection:
+    def __init__(self, broker):
+        self.broker = broker
+        self.closed = False
+        self.callbacks = queue.Queue()
+        self.event_pumps = 0
+
+    def add_callback_threadsafe(self, callback):
+        self.callbacks.put(callback)
+
+    def process_data_events(self, time_limit=0):
+        self.event_pumps += 1
+        with contextlib.suppress(queue.Empty):
+            self.callbacks.get(timeout=time_limit)()
+
+    def channel(self):
+        return FakeChannel(self.broker)
+
+    def close(self):
+        self.closed = True
+
+class FakeChannel:
+    def __init__(self, broker):
+        self.broker = broker
+        self.tags = 0
+
+    def queue_declare(self, queue, durable=False):
+        self.broker.queues[queue]
+
+    def basic_qos(self, prefetch_count):
+        pass
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        self.broker.queues[routing_key].append(body)
+
+    def consume(self, queue, inactivity_timeout=None):
+        while True:
+            if self.broker.queues[queue]:
+                self.tags += 1
+                yield Method(self.tags, False), None, self.broker.queues[queue].popleft()
+            else:
+                yield None, None, None
+
+    def basic_ack(self, delivery_tag):
+        self.broker.acked.append(delivery_tag)
+
+    def cancel(self):
+        pass
+
+class TestAmqpJobBackend(JobTestCase):
+    def setUp(self):
+        super().setUp()
+        self.broker = FakeBroker()
+        self.amqp = AmqpJobBackend('amqp://broker.invalid/', queue='test_jobs', connection_factory=self.broker.connect)
+
+    def test_jobs_published_and_consumed(self):
+        with patch.object(app_module, 'job_backend', self.amqp):
+            job_id = self.client.post('/scrape', json={'count': 4}).get_json()['job']['id']
+        self.assertEqual(list(self.broker.queues['test_jobs']), [job_id.encode()])
+        self.assertEqual(self.job(job_id)['status'], 'queued')
+
+        stop = threading.Event()
+        stop.set()
+        with patch('app.scrape_metacritic', fake_scrape(pages=2)):
+            self.amqp.consume(stop=stop)
+
+        self.assertEqual(self.broker.acked, [1])
+        job = self.job(job_id)
+        self.assertEqual((job['status'], job['games_collected']), ('succeeded', 4))
+
+    def test_connection_is_serviced_while_a_job_runs(self):
+        with patch.object(app_module, 'job_backend', self.amqp):
+            job_id = self.client.post('/scrape').get_json()['job']['id']
+        connections = []
+        connect = self.broker.connect
+        self.amqp._connect = lambda: connections.append(connect()) or connections[-1]
+        stop = threading.Event()
+        stop.set()
+        scrape = fake_scrape()
+
+        def slow_scrape(**kwargs):
+            time.sleep(1.5)
+            return scrape(**kwargs)
+
+        with patch('app.scrape_metacritic', slow_scrape):
+            self.amqp.consume(stop=stop)
+        # Heartbeats were answered between pages, and the ack came once the job was done
+        self.assertGreater(connections[0].event_pumps, 1)
+        self.assertEqual(self.broker.acked, [1])
+        self.assertEqual(self.job(job_id)['status'], 'succeeded')
+
+    def test_job_that_crashes_is_not_acked(self):
+        with patch.object(app_module, 'job_backend', self.amqp):
+            self.client.post('/scrape')
+        with patch('app.run_scrape_job', side_effect=RuntimeError('database is gone')):
+            with self.assertRaisesRegex(RuntimeError, 'database is gone'):
+                self.amqp.consume()
+        self.assertEqual(self.broker.acked, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import appfixtures
+
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import app as app_module
+from app import LeaderLock
+
+HOLD_LOCK = textwrap.dedent('''
+    import sys, time
+    sys.path.insert(0, {src!r})
+    from app import LeaderLock
+    lock = LeaderLock({path!r})
+    print(lock.try_acquire(), flush=True)
+    time.sleep(30)
+''')
+
+class TestLeaderLock(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'scheduler.lock')
+
+    def hold_in_other_process(self):
+        code = HOLD_LOCK.format(src=os.path.dirname(os.path.abspath(__file__)), path=self.path)
+        proc = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE, text=True)
+        self.addCleanup(proc.wait)
+        self.addCleanup(proc.kill)
+        self.assertEqual(proc.stdout.readline().strip(), 'True')
+        return proc
+
+    def test_only_one_process_leads(self):
+        proc = self.hold_in_other_process()
+        self.assertFalse(LeaderLock(self.path).try_acquire())
+        proc.kill()
+        proc.wait()
+        # The lock goes away with the process that held it
+        self.assertTrue(LeaderLock(self.path).try_acquire())
+
+    def test_acquire_is_idempotent(self):
+        lock = LeaderLock(self.path)
+        self.assertTrue(lock.try_acquire())
+        self.assertTrue(lock.try_acquire())
+        self.assertTrue(lock.held)
+
+class TestLazyStartup(unittest.TestCase):
+    def test_import_does_not_load_heavy_modules(self):
+        code = 'import sys, app; print(sorted(m for m in ("playwright", "bs4", "lxml", "pika") if m in sys.modules))'
+        env = dict(os.environ, DATABASE_URL='sqlite://')
+        out = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             env=env, capture_output=True, text=True, check=True).stdout
+        self.assertEqual(out.strip(), '[]')
+
+    def test_first_request_starts_scheduler_once(self):
+        lock = LeaderLock(os.path.join(tempfile.mkdtemp(), 'scheduler.lock'))
+        started = threading.Event()
+        with patch.object(app_module, '_started', False), \
+                patch.object(app_module, '_scheduler_started', False), \
+                patch.object(app_module, 'scheduler_lock', lock), \
+                patch.dict(app_module.app.config, {'SCHEDULER_ENABLED': True}), \
+                patch.object(app_module.scheduler, 'start', side_effect=started.set) as start:
+            client = app_module.app.test_client()
+            client.get('/health')
+            client.get('/health')
+            self.assertTrue(started.wait(5))
+        self.assertEqual(start.call_count, 1)
+        self.assertTrue(lock.held)
+
+    def test_gunicorn_worker_starts_scheduler_without_a_request(self):
+        conf_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+        with patch.dict(os.environ):
+            conf = runpy.run_path(conf_path)
+        lock = LeaderLock(os.path.join(tempfile.mkdtemp(), 'scheduler.lock'))
+        started = threading.Event()
+        with patch.object(app_module, '_scheduler_started', False), \
+                patch.object(app_module, 'scheduler_lock', lock), \
+                patch.dict(app_module.app.config, {'SCHEDULER_ENABLED': True}), \
+                patch.object(app_module.scheduler, 'start', side_effect=started.set):
+            conf['post_worker_init'](SimpleNamespace(wsgi=app_module.app))
+            self.assertTrue(started.wait(5))
+        self.assertTrue(lock.held)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+from appfixtures import reset_db
+
+import os
+import asyncio
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from prometheus_client import REGISTRY
+
+from app import BrowserPool, app, parse_cards, refresh_games, scrape_pages
+from fixtureserver import render_browse_page
+from testbrowserpool import FakeLauncher
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def stage_count(stage):
+    return sample('scrape_stage_seconds_count', stage=stage)
+
+class TestRequestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_routes_are_labelled_by_template(self):
+        before = sample('app_requests_total', method='GET', endpoint='/scrape/<job_id>')
+        self.client.get('/scrape/first-job')
+        self.client.get('/scrape/second-job')
+        self.assertEqual(sample('app_requests_total', method='GET', endpoint='/scrape/<job_id>') - before, 2)
+        self.assertEqual(sample('app_requests_total', method='GET', endpoint='/scrape/first-job'), 0)
+
+    def test_unknown_paths_and_methods_share_a_label(self):
+        before = sample('app_requests_total', method='GET', endpoint='unmatched')
+        self.client.get('/no-such-page')
+        self.client.get('/another-missing-page')
+        self.assertEqual(sample('app_requests_total', method='GET', endpoint='unmatched') - before, 2)
+
+        before = sample('app_requests_total', method='other', endpoint='unmatched')
+        self.client.open('/health', method='BREW')
+        self.assertEqual(sample('app_requests_total', method='other', endpoint='unmatched') - before, 1)
+
+    def test_metrics_endpoint(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version='))
+        self.assertIn(b'# TYPE scrape_stage_seconds histogram', response.data)
+
+class TestScrapeMetrics(unittest.TestCase):
+    def test_parse_counts_stage_and_cards(self):
+        before = stage_count('parse'), sample('scrape_cards_parsed_total')
+        games = parse_cards(render_browse_page(1, per_page=6), extractor='lxml')
+        self.assertEqual(len(games), 6)
+        self.assertEqual(stage_count('parse') - before[0], 1)
+        self.assertEqual(sample('scrape_cards_parsed_total') - before[1], 6)
+
+    def test_only_pages_out_of_retries_count_as_failed(self):
+        attempts = []
+
+        async def flaky(page_num):
+            attempts.append(page_num)
+            if len(attempts) < 3:
+                raise RuntimeError('flaky')
+            return []
+
+        async def broken(page_num):
+            raise RuntimeError('broken')
+
+        before = sample('scrape_pages_failed_total')
+        asyncio.run(scrape_pages(flaky, retries=2))
+        self.assertEqual(sample('scrape_pages_failed_total') - before, 0)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(scrape_pages(broken, retries=2))
+        self.assertEqual(sample('scrape_pages_failed_total') - before, 1)
+
+    def test_browser_launch_is_timed(self):
+        pool = BrowserPool(launcher=FakeLauncher())
+        self.addCleanup(pool.shutdown)
+
+        async def use():
+            async with pool.page():
+                pass
+
+        before = stage_count('launch')
+        pool.run(use())
+        self.assertEqual(stage_count('launch') - before, 1)
+
+    def test_refresh_write_is_timed(self):
+        reset_db()
+        with app.app_context():
+            before = stage_count('db_write')
+            refresh_games([{'title': 'A', 'score': '90', 'link': '/game/a/'}])
+        self.assertEqual(stage_count('db_write') - before, 1)
+
+class TestMultiprocessMetrics(unittest.TestCase):
+    """Every gunicorn worker is a separate process, /metrics must add them up."""
+
+    def run_worker(self, metrics_dir, path):
+        script = (
+            'import sys\n'
+            'from app import app\n'
+            'response = app.test_client().get(sys.argv[1])\n'
+            'sys.stdout.write(response.get_data(as_text=True))\n'
+        )
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=metrics_dir, DATABASE_URL='sqlite://', SCHEDULER_ENABLED='0')
+        result = subprocess.run([sys.executable, '-c', script, path], cwd=HERE, env=env,
+                                capture_output=True, text=True, timeout=60, check=True)
+        return result.stdout
+
+    def test_metrics_are_summed_across_processes(self):
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            self.run_worker(metrics_dir, '/health')
+            self.run_worker(metrics_dir, '/health')
+            output = self.run_worker(metrics_dir, '/metrics')
+        self.assertIn('app_requests_total{endpoint="/health",method="GET"} 2.0', output)
+
+if __name__ == '__main__':
+    unittest.main()
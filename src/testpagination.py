@@ -0,0 +1,118 @@
+from appfixtures import game, reset_db
+
+import json
+import unittest
+from unittest.mock import patch
+
+from app import app, refresh_games
+
+class PaginationTestCase(unittest.TestCase):
+    rows = 25
+
+    def setUp(self):
+        self.client = app.test_client()
+        reset_db()
+        with app.app_context():
+            refresh_games([game(n) for n in range(self.rows)])
+
+    def expected(self, games):
+        return [{'title': g['title'], 'score': g['score'], 'link': g['link']} for g in games]
+
+class TestKeysetPagination(PaginationTestCase):
+    def test_walk_pages_with_cursor(self):
+        seen = []
+        url = '/games_db?limit=10'
+        while url:
+            response = self.client.get(url)
+            seen.extend(response.get_json())
+            cursor = response.headers.get('X-Next-Cursor')
+            url = f'/games_db?after={cursor}&limit=10' if cursor else None
+            if cursor:
+                self.assertIn(f'after={cursor}', response.headers['Link'])
+        self.assertEqual(seen, self.expected([game(n) for n in range(self.rows)]))
+
+    def test_last_page_has_no_cursor(self):
+        response = self.client.get('/games_db?limit=25')
+        self.assertEqual(len(response.get_json()), 25)
+        self.assertEqual(response.headers['X-Next-Cursor'], '25')
+        response = self.client.get('/games_db?after=25&limit=25')
+        self.assertEqual(response.get_json(), [])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_games_html_page_links_to_next(self):
+        html = self.client.get('/games?count=10').get_data(as_text=True)
+        self.assertIn('Game 9', html)
+        self.assertNotIn('Game 10<', html)
+        self.assertIn('/games?count=10&after=10', html)
+        html = self.client.get('/games?count=10&after=10').get_data(as_text=True)
+        self.assertIn('Game 10', html)
+        self.assertNotIn('Game 9<', html)
+
+    def test_page_sizes_are_clamped(self):
+        for count in (0, -1):
+            response = self.client.get(f'/games?count={count}')
+            self.assertEqual(response.status_code, 200)
+            html = response.get_data(as_text=True)
+            self.assertIn('Game 0<', html)
+            self.assertNotIn('Game 1<', html)
+        with patch.dict(app.config, {'GAMES_PAGE_MAX': 5}):
+            html = self.client.get('/games?count=-1').get_data(as_text=True)
+            self.assertNotIn('Game 5<', html)
+            response = self.client.get('/games_db?limit=50')
+        self.assertEqual(len(response.get_json()), 5)
+        self.assertIn('limit=5>', response.headers['Link'])
+        response = self.client.get('/games_db?limit=0')
+        self.assertEqual(len(response.get_json()), 1)
+        self.assertIn('after=1&limit=1>', response.headers['Link'])
+
+class TestStreamingExport(PaginationTestCase):
+    rows = 2500
+
+    def test_json_stream_matches_full_list(self):
+        with app.app_context():
+            app.config['GAMES_STREAM_BATCH'] = 100
+        try:
+            response = self.client.get('/games_db')
+            # A Content-Length would mean the body was buffered up front
+            self.assertNotIn('Content-Length', response.headers)
+            self.assertEqual(response.get_json(), self.expected([game(n) for n in range(self.rows)]))
+        finally:
+            app.config['GAMES_STREAM_BATCH'] = 1000
+
+    def test_ndjson_stream(self):
+        response = self.client.get('/games_db?format=ndjson&after=2490')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected([game(n) for n in range(2490, 2500)]))
+
+    def test_empty_catalog(self):
+        self.assertEqual(self.client.get('/games_db?after=100000').get_json(), [])
+
+class TestConditionalRequests(PaginationTestCase):
+    def test_unchanged_catalog_returns_304(self):
+        first = self.client.get('/games_db')
+        etag = first.headers['ETag']
+        self.assertIn('Last-Modified', first.headers)
+        again = self.client.get('/games_db', headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.get_data(), b'')
+
+    def test_refresh_changes_etag(self):
+        etag = self.client.get('/games_db?limit=5').headers['ETag']
+        with app.app_context():
+            refresh_games([game(n) for n in range(1, self.rows + 1)])
+        response = self.client.get('/games_db?limit=5', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_etag_differs_per_page(self):
+        first = self.client.get('/games_db?limit=5').headers['ETag']
+        second = self.client.get('/games_db?limit=5&after=5').headers['ETag']
+        self.assertNotEqual(first, second)
+
+    def test_games_page_revalidates(self):
+        etag = self.client.get('/games').headers['ETag']
+        self.assertEqual(self.client.get('/games', headers={'If-None-Match': etag}).status_code, 304)
+
+if __name__ == '__main__':
+    unittest.main()
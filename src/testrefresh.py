@@ -0,0 +1,208 @@
+from appfixtures import game, reset_db
+
+import contextlib
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+
+from app import app, db, Game, Refresh, RefreshRejected, init_db, refresh_games
+
+class TestRefreshGames(unittest.TestCase):
+    def setUp(self):
+        self.ctx = app.app_context()
+        self.ctx.push()
+        reset_db()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+
+    def stored(self):
+        return {g.link: (g.title, g.score) for g in Game.query.all()}
+
+    def test_first_refresh_inserts_everything(self):
+        refresh = refresh_games([game(1), game(2)])
+        self.assertEqual((refresh.total, refresh.added, refresh.changed, refresh.removed), (2, 2, 0, 0))
+        self.assertEqual(len(self.stored()), 2)
+
+    def test_incremental_refresh_applies_diff(self):
+        refresh_games([game(1), game(2), game(3)])
+        ids = {g.link: g.id for g in Game.query.all()}
+
+        refresh = refresh_games([game(1), game(2, score='75'), game(4)])
+        self.assertEqual((refresh.added, refresh.changed, refresh.removed), (1, 1, 1))
+        self.assertEqual(self.stored(), {
+            game(1)['link']: ('Game 1', '90'),
+            game(2)['link']: ('Game 2', '75'),
+            game(4)['link']: ('Game 4', '90'),
+        })
+        # Unchanged and updated rows keep their ids
+        current = {g.link: g.id for g in Game.query.all()}
+        self.assertEqual(current[game(1)['link']], ids[game(1)['link']])
+        self.assertEqual(current[game(2)['link']], ids[game(2)['link']])
+
+    def test_unchanged_refresh_writes_nothing(self):
+        refresh_games([game(1), game(2)])
+        refresh = refresh_games([game(1), game(2)])
+        self.assertEqual((refresh.added, refresh.changed, refresh.removed), (0, 0, 0))
+
+    def test_duplicate_links_keep_first(self):
+        refresh = refresh_games([game(1, score='80'), game(1, score='10')])
+        self.assertEqual((refresh.total, refresh.skipped), (1, 1))
+        self.assertEqual(self.stored(), {game(1)['link']: ('Game 1', '80')})
+
+    def test_cards_without_links_are_skipped_and_counted(self):
+        unlinked = [{'title': f'Unlinked {n}', 'score': '70', 'link': 'N/A'} for n in range(3)]
+        refresh = refresh_games([game(1)] + unlinked)
+        self.assertEqual((refresh.total, refresh.added, refresh.skipped), (1, 1, 3))
+        self.assertEqual(set(self.stored()), {game(1)['link']})
+
+    def test_replace_mode_rewrites_table(self):
+        refresh_games([game(1), game(2)])
+        refresh = refresh_games([game(2, score='70'), game(3)], mode='replace')
+        self.assertEqual((refresh.mode, refresh.added, refresh.changed, refresh.removed), ('replace', 1, 1, 1))
+        self.assertEqual(set(self.stored()), {game(2)['link'], game(3)['link']})
+
+    def test_refreshes_are_logged(self):
+        refresh_games([game(1), game(2)])
+        refresh_games([game(1)])
+        self.assertEqual([r.removed for r in Refresh.query.order_by(Refresh.id)], [0, 1])
+
+    def test_empty_or_truncated_scrape_is_refused(self):
+        refresh_games([game(n) for n in range(10)])
+        for mode in ('incremental', 'replace'):
+            for games in ([], [game(1)], [{'title': 'Unlinked', 'score': '70', 'link': 'N/A'}]):
+                with self.assertRaises(RefreshRejected):
+                    refresh_games(games, mode=mode)
+        self.assertEqual(len(self.stored()), 10)
+        self.assertEqual(Refresh.query.count(), 1)
+
+    def test_forced_refresh_may_empty_the_table(self):
+        refresh_games([game(1), game(2)])
+        for mode in ('replace', 'incremental'):
+            refresh = refresh_games([], mode=mode, force=True)
+            self.assertEqual(refresh.total, 0)
+            self.assertEqual(self.stored(), {})
+
+    def test_replace_mode_with_nothing_to_insert(self):
+        refresh = refresh_games([{'title': 'Unlinked', 'score': '70', 'link': 'N/A'}], mode='replace')
+        self.assertEqual((refresh.total, refresh.skipped), (0, 1))
+
+    def test_large_catalog(self):
+        refresh_games([game(n) for n in range(10000)])
+        changed = [game(n, score='50') if n % 100 == 0 else game(n) for n in range(100, 10100)]
+        refresh = refresh_games(changed)
+        self.assertEqual((refresh.added, refresh.changed, refresh.removed), (100, 99, 100))
+        self.assertEqual(Game.query.count(), 10000)
+
+    def test_migration_dedupes_links_of_old_databases(self):
+        db.drop_all()
+        db.session.execute(text(
+            'CREATE TABLE game (id INTEGER NOT NULL, title VARCHAR(256) NOT NULL, '
+            'score VARCHAR(10), link VARCHAR(512), PRIMARY KEY (id))'
+        ))
+        db.session.execute(text(
+            "INSERT INTO game (title, score, link) VALUES ('A', '90', 'x'), ('A again', '80', 'x'), ('B', '70', 'y')"
+        ))
+        db.session.commit()
+        init_db(force=True)
+        self.assertEqual(sorted(g.title for g in Game.query.all()), ['A', 'B'])
+
+    def test_migration_adds_skipped_to_old_refreshes(self):
+        db.drop_all()
+        db.session.execute(text(
+            'CREATE TABLE refresh (id INTEGER NOT NULL, mode VARCHAR(16) NOT NULL, started_at DATETIME NOT NULL, '
+            'finished_at DATETIME NOT NULL, total INTEGER NOT NULL, added INTEGER NOT NULL, changed INTEGER NOT NULL, '
+            'removed INTEGER NOT NULL, write_ms FLOAT NOT NULL, PRIMARY KEY (id))'
+        ))
+        db.session.commit()
+        init_db(force=True)
+        self.assertEqual(refresh_games([game(1)]).skipped, 0)
+
+CONCURRENT_REFRESHES = textwrap.dedent('''
+    import os, random, sys, threading
+    os.environ['DATABASE_URL'] = 'sqlite:///' + sys.argv[1]
+    os.environ['SCHEDULER_ENABLED'] = '0'
+    from sqlalchemy import select
+    from app import app, db, Game, ScoreBucket, refresh_games
+
+    def game(n, score):
+        return {'title': f'Game {n}', 'score': str(score), 'link': f'https://www.metacritic.com/game/{n}/'}
+
+    errors = []
+    def refresh_repeatedly(seed):
+        rng = random.Random(seed)
+        with app.app_context():
+            for _ in range(15):
+                try:
+                    refresh_games([game(n, rng.randint(50, 100)) for n in range(rng.randint(0, 20), 200)])
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(repr(e))
+
+    with app.app_context():
+        refresh_games([game(n, 70) for n in range(200)])
+    threads = [threading.Thread(target=refresh_repeatedly, args=(seed,)) for seed in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with app.app_context():
+        print(errors)
+        print(sum(db.session.scalars(select(ScoreBucket.games))) == Game.query.count())
+''')
+
+class TestConcurrentRefreshes(unittest.TestCase):
+    def test_refreshes_on_a_file_database_do_not_collide(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'games.db')
+            result = subprocess.run(
+                [sys.executable, '-c', CONCURRENT_REFRESHES, path],
+                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=120, check=True
+            )
+            with contextlib.closing(sqlite3.connect(path)) as conn:
+                journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(result.stdout.split('\n')[:2], ['[]', 'True'])
+        self.assertEqual(journal_mode, 'wal')
+
+    def test_pragmas_leave_other_engines_alone(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine('sqlite:///' + os.path.join(tmp, 'other.db'))
+            with engine.connect() as conn:
+                self.assertEqual(conn.exec_driver_sql('PRAGMA journal_mode').scalar(), 'delete')
+            engine.dispose()
+
+class TestRefreshesRoute(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        reset_db()
+
+    def test_lists_latest_refresh_first(self):
+        with app.app_context():
+            refresh_games([game(1), game(2)])
+            refresh_games([game(2)])
+        refreshes = self.client.get('/refreshes').get_json()
+        self.assertEqual([(r['added'], r['removed']) for r in refreshes], [(0, 1), (2, 0)])
+
+    def test_count_is_clamped(self):
+        with app.app_context():
+            for n in range(3):
+                refresh_games([game(n)], force=True)
+        self.assertEqual(len(self.client.get('/refreshes?count=-1').get_json()), 1)
+        with patch.dict(app.config, {'GAMES_PAGE_MAX': 2}):
+            self.assertEqual(len(self.client.get('/refreshes?count=50').get_json()), 2)
+
+    def test_lists_skipped_cards(self):
+        with app.app_context():
+            refresh_games([game(1), {'title': 'Unlinked', 'score': '70', 'link': 'N/A'}])
+        self.assertEqual(self.client.get('/refreshes').get_json()[0]['skipped'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
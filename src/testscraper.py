@@ -0,0 +1,134 @@
+import appfixtures
+
+import asyncio
+import unittest
+
+from app import parse_cards, scrape_pages
+from fixtureserver import render_browse_page
+
+def fake_catalog(pages, per_page=3, delays=None, failures=None, calls=None):
+    """Build a `fetch_page` coroutine over a fake catalog of `pages` pages."""
+    failures = dict(failures or {})
+
+    async def fetch_page(page_num):
+        if calls is not None:
+            calls.append(page_num)
+        await asyncio.sleep((delays or {}).get(page_num, 0))
+        if failures.get(page_num):
+            failures[page_num] -= 1
+            raise RuntimeError(f'page {page_num} failed')
+        if page_num > pages:
+            return []
+        return [{'title': f'Game {page_num}-{i}'} for i in range(per_page)]
+
+    return fetch_page
+
+class TestScrapePages(unittest.TestCase):
+    def run_scrape(self, fetch_page, **kwargs):
+        return asyncio.run(scrape_pages(fetch_page, **kwargs))
+
+    def test_results_are_in_page_order(self):
+        # Later pages finish first but must still come out after earlier ones
+        delays = {1: 0.05, 2: 0.03, 3: 0.01}
+        games = self.run_scrape(fake_catalog(3, delays=delays), concurrency=4)
+        self.assertEqual(len(games), 9)
+        self.assertEqual([g['title'] for g in games[::3]], ['Game 1-0', 'Game 2-0', 'Game 3-0'])
+
+    def test_stops_at_first_empty_page(self):
+        calls = []
+        games = self.run_scrape(fake_catalog(2, calls=calls), concurrency=3)
+        self.assertEqual(len(games), 6)
+        self.assertNotIn(6, calls)
+
+    def test_stops_once_count_is_reached(self):
+        games = self.run_scrape(fake_catalog(10), count=4, concurrency=2)
+        self.assertEqual([g['title'] for g in games], ['Game 1-0', 'Game 1-1', 'Game 1-2', 'Game 2-0'])
+
+    def test_count_limits_pages_fetched(self):
+        for count, pages in ((10, [1]), (24, [1]), (30, [1, 2]), (60, [1, 2, 3])):
+            calls = []
+            games = self.run_scrape(fake_catalog(10, per_page=24, calls=calls), count=count, concurrency=4)
+            self.assertEqual(len(games), count)
+            self.assertEqual(sorted(calls), pages)
+
+    def test_short_page_fetches_one_more(self):
+        fetch_page = fake_catalog(10, per_page=4)
+
+        async def short_second_page(page_num):
+            games = await fetch_page(page_num)
+            return games[:1] if page_num == 2 else games
+
+        games = self.run_scrape(short_second_page, count=8, concurrency=4)
+        self.assertEqual(len(games), 8)
+
+    def test_failed_page_is_retried_on_its_own(self):
+        calls = []
+        games = self.run_scrape(fake_catalog(3, failures={2: 1}, calls=calls), concurrency=3, retries=1)
+        self.assertEqual(len(games), 9)
+        self.assertEqual(calls.count(2), 2)
+        self.assertEqual(calls.count(1), 1)
+
+    def test_page_that_keeps_failing_raises(self):
+        with self.assertRaises(RuntimeError):
+            self.run_scrape(fake_catalog(3, failures={2: 5}), concurrency=2, retries=2)
+
+    def test_failure_past_the_last_page_is_ignored(self):
+        # Page 4 fails for good, but page 3 already ended the catalog
+        fetch_page = fake_catalog(2, delays={3: 0.02}, failures={4: 5})
+        games = self.run_scrape(fetch_page, concurrency=4)
+        self.assertEqual(len(games), 6)
+
+    def test_failure_is_raised_in_page_order(self):
+        fetch_page = fake_catalog(5, delays={1: 0.02}, failures={3: 5})
+        with self.assertRaisesRegex(RuntimeError, 'page 3 failed'):
+            self.run_scrape(fetch_page, concurrency=4)
+
+    def test_slow_progress_does_not_hold_up_fetches(self):
+        fetch_page = fake_catalog(3, delays={2: 0.02})
+        finished = []
+        reports = []
+
+        async def fetch_and_record(page_num):
+            games = await fetch_page(page_num)
+            finished.append(page_num)
+            return games
+
+        async def progress(pages_done, games_collected):
+            await asyncio.sleep(0.1)
+            reports.append((pages_done, games_collected, list(finished)))
+
+        self.run_scrape(fetch_and_record, concurrency=2, progress=progress)
+        self.assertEqual([report[:2] for report in reports], [(1, 3), (2, 6), (3, 9)])
+        # Page 2 kept loading while the progress for page 1 was being written
+        self.assertIn(2, reports[0][2])
+
+    def test_concurrency_bounds_pages_in_flight(self):
+        in_flight = []
+        peak = []
+        inner = fake_catalog(8, delays={n: 0.01 for n in range(1, 10)})
+
+        async def fetch_page(page_num):
+            in_flight.append(page_num)
+            peak.append(len(in_flight))
+            try:
+                return await inner(page_num)
+            finally:
+                in_flight.remove(page_num)
+
+        self.run_scrape(fetch_page, concurrency=3)
+        self.assertEqual(max(peak), 3)
+
+class TestParseCards(unittest.TestCase):
+    def test_fixture_page(self):
+        games = parse_cards(render_browse_page(2, per_page=2))
+        self.assertEqual(games, [
+            {'title': 'Fixture Game 3', 'score': '97', 'link': 'https://www.metacritic.com/game/fixture-game-3/'},
+            {'title': 'Fixture Game 4', 'score': '96', 'link': 'https://www.metacritic.com/game/fixture-game-4/'},
+        ])
+
+    def test_missing_fields_fall_back_to_na(self):
+        games = parse_cards('<div class="c-finderProductCard"></div>')
+        self.assertEqual(games, [{'title': 'N/A', 'score': 'N/A', 'link': 'N/A'}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+from appfixtures import game, reset_db
+
+import random
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import select, text
+
+from app import app, db, Game, ScoreBucket, init_db, refresh_games
+
+class StatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.ctx = app.app_context()
+        self.ctx.push()
+        reset_db()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+
+    def buckets(self):
+        return dict(db.session.execute(select(ScoreBucket.score, ScoreBucket.games)).all())
+
+    def recount(self):
+        counts = {}
+        for g in Game.query.all():
+            if g.score_value is not None:
+                counts[g.score_value] = counts.get(g.score_value, 0) + 1
+        return counts
+
+class TestScoreSummary(StatsTestCase):
+    def test_score_value_set_at_ingest(self):
+        refresh_games([game(1, '91'), game(2, 'N/A'), game(3, 'tbd')])
+        values = {g.title: g.score_value for g in Game.query.all()}
+        self.assertEqual(values, {'Game 1': 91, 'Game 2': None, 'Game 3': None})
+
+    def test_summary_tracks_refreshes(self):
+        rng = random.Random(7)
+        for mode in ['incremental'] * 6 + ['replace'] * 2:
+            games = [game(n, rng.choice(['N/A', str(rng.randint(20, 99))])) for n in rng.sample(range(200), 120)]
+            refresh_games(games, mode=mode)
+            self.assertEqual(self.buckets(), self.recount())
+
+    def test_emptied_buckets_are_dropped(self):
+        refresh_games([game(1, '80'), game(2, '70')])
+        refresh_games([game(1, '75')])
+        self.assertEqual(self.buckets(), {75: 1})
+
+    def test_migration_types_existing_scores(self):
+        db.drop_all()
+        db.session.execute(text(
+            'CREATE TABLE game (id INTEGER NOT NULL, title VARCHAR(256) NOT NULL, '
+            'score VARCHAR(10), link VARCHAR(512), PRIMARY KEY (id))'
+        ))
+        db.session.execute(text(
+            "INSERT INTO game (title, score, link) VALUES "
+            "('A', '90', 'a'), ('B', 'N/A', 'b'), ('C', '70', 'c'), ('D', '90', 'd')"
+        ))
+        db.session.commit()
+        init_db(force=True)
+        self.assertEqual([g.score_value for g in Game.query.order_by(Game.id)], [90, None, 70, 90])
+        self.assertEqual(self.buckets(), {90: 2, 70: 1})
+        data = self.client.get('/average_score').get_json()
+        self.assertEqual((data['average_score'], data['game_count']), (83.33, 3))
+
+class TestStatsRoutes(StatsTestCase):
+    def test_average_score(self):
+        refresh_games([game(1, '90'), game(2, '85'), game(3, 'N/A')])
+        data = self.client.get('/average_score').get_json()
+        self.assertEqual(data, {'average_score': 87.5, 'game_count': 2})
+
+    def test_average_score_without_scores(self):
+        data = self.client.get('/average_score').get_json()
+        self.assertEqual(data['game_count'], 0)
+        self.assertIsNone(data['average_score'])
+
+    def test_stats(self):
+        refresh_games([game(n, str(score)) for n, score in enumerate(range(51, 101))] + [game(99, 'N/A')])
+        data = self.client.get('/stats?top=3&bucket=25').get_json()
+        self.assertEqual(data['game_count'], 50)
+        self.assertEqual(data['average_score'], 75.5)
+        self.assertEqual((data['min_score'], data['max_score']), (51, 100))
+        self.assertEqual(data['percentiles']['p50'], 75)
+        self.assertEqual(data['percentiles']['p90'], 95)
+        self.assertEqual(data['percentiles']['p99'], 100)
+        self.assertEqual(data['histogram'], [
+            {'min': 50, 'max': 74, 'games': 24},
+            {'min': 75, 'max': 99, 'games': 25},
+            {'min': 100, 'max': 124, 'games': 1},
+        ])
+        self.assertEqual([g['score'] for g in data['top']], [100, 99, 98])
+
+    def test_top_is_clamped(self):
+        refresh_games([game(n, str(score)) for n, score in enumerate(range(81, 101))])
+        self.assertEqual(self.client.get('/stats?top=-5').get_json()['top'], [])
+        with patch.dict(app.config, {'GAMES_PAGE_MAX': 5}):
+            self.assertEqual(len(self.client.get('/stats?top=1000000').get_json()['top']), 5)
+
+    def test_stats_without_scores(self):
+        self.assertEqual(self.client.get('/stats').get_json()['game_count'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
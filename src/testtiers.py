@@ -0,0 +1,114 @@
+import appfixtures
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+import app as app_module
+from app import app, fetch_browse_page, parse_cards, scrape_pages
+from fixtureserver import FixtureServer
+
+def tier_count(tier, outcome):
+    return REGISTRY.get_sample_value('scrape_tier_requests_total', {'tier': tier, 'outcome': outcome}) or 0
+
+class FakeBrowserTier:
+    """Stands in for fetch_with_browser by rendering the page server-side."""
+
+    def __init__(self, server):
+        self.server = server
+        self.urls = []
+
+    async def __call__(self, pool, url):
+        self.urls.append(url)
+        page_num = int(url.rsplit('=', 1)[1])
+        html = self.server.render(page_num, server_side=True)
+        return parse_cards(html) if html else []
+
+class TestTieredFetch(unittest.TestCase):
+    def scrape(self, server, concurrency=1):
+        fetch = lambda page_num: fetch_browse_page(None, page_num, server.browse_url)
+        return asyncio.run(scrape_pages(fetch, concurrency=concurrency))
+
+    def setUp(self):
+        app_module.http_session.cache_clear()
+
+    def test_server_rendered_pages_skip_the_browser(self):
+        before = tier_count('http', 'hit')
+        with FixtureServer(pages=3, per_page=4) as server:
+            browser = FakeBrowserTier(server)
+            with patch('app.fetch_with_browser', browser):
+                games = self.scrape(server)
+        self.assertEqual(len(games), 12)
+        self.assertEqual(browser.urls, [])
+        self.assertEqual(tier_count('http', 'hit') - before, 4)  # 3 pages and the 404 past the end
+
+    def test_js_only_page_falls_back_to_browser(self):
+        before = tier_count('http', 'miss'), tier_count('browser', 'hit')
+        with FixtureServer(pages=3, per_page=4, js_pages={2}) as server:
+            browser = FakeBrowserTier(server)
+            with patch('app.fetch_with_browser', browser):
+                games = self.scrape(server, concurrency=3)
+        self.assertEqual([g['title'] for g in games], [f'Fixture Game {n}' for n in range(1, 13)])
+        self.assertEqual(browser.urls, [server.browse_url.format(page=2)])
+        self.assertEqual(tier_count('http', 'miss') - before[0], 1)
+        self.assertEqual(tier_count('browser', 'hit') - before[1], 1)
+
+    def test_unreachable_http_falls_back_to_browser(self):
+        before = tier_count('http', 'error')
+        with FixtureServer(pages=1, per_page=2) as server:
+            browser = FakeBrowserTier(server)
+        # The server is gone, so the plain fetch fails outright
+        with patch('app.fetch_with_browser', browser):
+            with patch.dict(app.config, {'SCRAPE_HTTP_TIMEOUT': 1}):
+                games = asyncio.run(fetch_browse_page(None, 1, server.browse_url))
+        self.assertEqual(len(games), 2)
+        self.assertEqual(tier_count('http', 'error') - before, 1)
+
+    def test_browser_only_tiers(self):
+        with FixtureServer(pages=1, per_page=2) as server:
+            browser = FakeBrowserTier(server)
+            with patch('app.fetch_with_browser', browser), patch.dict(app.config, {'SCRAPE_TIERS': ['browser']}):
+                asyncio.run(fetch_browse_page(None, 1, server.browse_url))
+            self.assertEqual(server.hits, [])
+        self.assertEqual(len(browser.urls), 1)
+
+    def test_http_only_tiers_refuse_js_pages(self):
+        with FixtureServer(pages=1, js_pages={1}) as server:
+            with patch.dict(app.config, {'SCRAPE_TIERS': ['http']}):
+                with self.assertRaises(RuntimeError):
+                    asyncio.run(fetch_browse_page(None, 1, server.browse_url))
+
+    def test_session_keeps_connections_alive_and_gzips(self):
+        with FixtureServer(pages=5, per_page=2) as server:
+            with patch('app.fetch_with_browser', FakeBrowserTier(server)):
+                self.scrape(server)
+        self.assertEqual(len(server.client_ports), 1)
+        self.assertTrue(all('gzip' in encoding for encoding in server.encodings))
+
+    def test_base_url_points_scrape_at_replay_server(self):
+        with FixtureServer(recorded=True) as server:
+            with patch.dict(app.config, {'METACRITIC_BASE_URL': server.base_url, 'SCRAPE_TIERS': ['http']}):
+                games = app_module.scrape_metacritic(concurrency=2)
+        self.assertEqual(server.pages, 5)
+        self.assertEqual(len(games), 100)
+        # Every recorded page was fetched, and the 404 past the end stopped the scrape
+        self.assertLessEqual({1, 2, 3, 4, 5, 6}, set(server.hits))
+        # Links still name the real site, whichever host served the page
+        self.assertTrue(all(game['link'].startswith(app_module.SITE_URL + '/game/') for game in games))
+
+class TestBrowserTier(unittest.TestCase):
+    def test_browser_renders_js_only_pages(self):
+        pool = app_module.BrowserPool()
+        self.addCleanup(pool.shutdown)
+        try:
+            pool.run(pool._launch())
+        except Exception as e:
+            self.skipTest(f'Chromium is not available: {e}')
+        with FixtureServer(pages=2, per_page=3, js_pages={1, 2}) as server:
+            games = app_module.scrape_metacritic(browse_url=server.browse_url, pool=pool)
+        self.assertEqual(len(games), 6)
+
+if __name__ == '__main__':
+    unittest.main()